@@ -1,48 +1,80 @@
+import array
+import itertools
 import json
 import random
-import uuid
+from collections import Counter, defaultdict
+
+# Counter-derived block hashes, same scheme as ../main.py (see the note there)
+_HASH_SIZE = 16
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15F39CC0605CEDC835
+_HASH_MASK = (1 << (8 * _HASH_SIZE)) - 1
+_BLOCK_COUNTER = itertools.count(1)
+
+
+def _next_hash():
+    """Returns 16 unique bytes to simulate a block hash."""
+    n = (next(_BLOCK_COUNTER) * _HASH_MULTIPLIER) & _HASH_MASK
+    return n.to_bytes(_HASH_SIZE, "big")
+
 
 class Block:
     """
     A simplified block structure.
     """
+    __slots__ = ("height", "parent_hash", "hash")
+
     def __init__(self, height, parent_hash):
         self.height = height
         self.parent_hash = parent_hash
-        self.hash = str(uuid.uuid4())
+        self.hash = _next_hash()
 
     def __repr__(self):
-        return f"Block(h={self.height}, hash={self.hash[:6]}, parent={self.parent_hash[:6] if self.parent_hash else None})"
+        short_parent = self.parent_hash[:3].hex() if self.parent_hash else None
+        return f"Block(h={self.height}, hash={self.hash[:3].hex()}, parent={short_parent})"
 
-FIXED_GENESIS_HASH = "00000000-0000-0000-0000-000000000000"
+FIXED_GENESIS_HASH = bytes(_HASH_SIZE)
 
-GENESIS_BLOCK_TEMPLATE = Block(0, None)
+GENESIS_BLOCK_TEMPLATE = Block.__new__(Block)
+GENESIS_BLOCK_TEMPLATE.height = 0
+GENESIS_BLOCK_TEMPLATE.parent_hash = None
 GENESIS_BLOCK_TEMPLATE.hash = FIXED_GENESIS_HASH
 
 class Node:
     def __init__(self, node_id):
         self.node_id = node_id
-        # Clone the genesis block
-        genesis = Block(GENESIS_BLOCK_TEMPLATE.height, GENESIS_BLOCK_TEMPLATE.parent_hash)
-        genesis.hash = GENESIS_BLOCK_TEMPLATE.hash
-        self.chain = [genesis]
+        # Chain stored column-wise (index 0 is genesis); parents are implied by order.
+        # Raw hashes are packed back to back, _HASH_SIZE bytes per block.
+        self._heights = array.array("q", [GENESIS_BLOCK_TEMPLATE.height])
+        self._hash_log = bytearray(GENESIS_BLOCK_TEMPLATE.hash)
+        # Cached copy of the tip, kept in sync by add_block/discard_last_block
+        self._tip_height = GENESIS_BLOCK_TEMPLATE.height
+        self._tip_hash = GENESIS_BLOCK_TEMPLATE.hash
 
     def current_height(self):
-        return self.chain[-1].height
+        return self._tip_height
+
+    def tip_hash(self):
+        return self._tip_hash
 
     def propose_block(self):
-        latest = self.chain[-1]
-        new_block = Block(latest.height + 1, latest.hash)
-        return new_block
+        return Block(self._tip_height + 1, self._tip_hash)
 
     def add_block(self, block):
-        if block.height == self.current_height() + 1:
-            if block.parent_hash == self.chain[-1].hash:
-                self.chain.append(block)
+        if block.height == self._tip_height + 1:
+            if block.parent_hash == self._tip_hash:
+                self._heights.append(block.height)
+                self._hash_log += block.hash
+                self._tip_height = block.height
+                self._tip_hash = block.hash
+                return True
+        return False
 
     def discard_last_block(self):
-        if len(self.chain) > 1:
-            self.chain.pop()
+        if len(self._heights) > 1:
+            self._heights.pop()
+            del self._hash_log[-_HASH_SIZE:]
+            self._tip_height = self._heights[-1]
+            self._tip_hash = bytes(self._hash_log[-_HASH_SIZE:])
 
 def random_consensus_round(nodes):
     """
@@ -50,36 +82,40 @@ def random_consensus_round(nodes):
     so we can record it for visualization.
     """
     proposed_blocks = [node.propose_block() for node in nodes]
-
-    for node in nodes:
-        nxt = node.current_height() + 1
-        valid = [b for b in proposed_blocks if b.height == nxt]
+    blocks_by_height = defaultdict(list)
+    for b in proposed_blocks:
+        blocks_by_height[b.height].append(b)
+
+    heights = [node.current_height() for node in nodes]
+    max_h = max(heights, default=0)
+    rand = random.random
+    for i, node in enumerate(nodes):
+        nxt = heights[i] + 1
+        valid = blocks_by_height.get(nxt)
         if valid:
-            chosen = random.choice(valid)
-            node.add_block(chosen)
+            chosen = valid[int(rand() * len(valid))]
+            if node.add_block(chosen):
+                heights[i] = nxt
         else:
-            max_h = max(n.current_height() for n in nodes)
-            if max_h > node.current_height():
+            if max_h > heights[i]:
                 node.discard_last_block()
+                heights[i] = node.current_height()
 
     # "Majority-wins" logic (very simple: we just track height majority)
-    height_count = {}
-    for nd in nodes:
-        h = nd.current_height()
-        height_count[h] = height_count.get(h, 0) + 1
+    height_count = Counter(heights)
 
-    majority_height = max(height_count, key=height_count.get)
+    majority_height = height_count.most_common(1)[0][0]
 
     # If some nodes are not at the majority height, do nothing or do partial discards
     # (Simplified: we won't do big merges or adoption in this version.)
 
     # Return summary data for each node: node_id, height, chain_top_hash
     round_state = []
-    for nd in nodes:
+    for i, nd in enumerate(nodes):
         round_state.append({
             "node_id": nd.node_id,
-            "height": nd.current_height(),
-            "hash": nd.chain[-1].hash[:6]  # short hash for readability
+            "height": heights[i],
+            "hash": nd.tip_hash()  # full hash; shortened only when written out
         })
     return round_state
 
@@ -88,20 +124,22 @@ def main():
     ROUNDS = 10
     nodes = [Node(i) for i in range(NODES)]
 
-    all_rounds_data = []  # will store states for each round
-
-    for r in range(ROUNDS):
-        # run one consensus round
-        round_state = random_consensus_round(nodes)
-        # store the result
-        # also add a "round_index" to each node's data for identification in the final JSON
-        for s in round_state:
-            s["round"] = r
-        all_rounds_data.extend(round_state)
-
-    # Save into a JSON file
+    # Stream each round's states into the JSON array as soon as they are produced,
+    # so memory use does not grow with the number of rounds
     with open("consensus_data.json", "w") as f:
-        json.dump(all_rounds_data, f, indent=2)
+        f.write("[")
+        sep = "\n  "
+        for r in range(ROUNDS):
+            # run one consensus round
+            round_state = random_consensus_round(nodes)
+            # also add a "round_index" to each node's data for identification in the final JSON
+            for s in round_state:
+                s["round"] = r
+                s["hash"] = s["hash"][:3].hex()  # short hash for readability
+                f.write(sep)
+                f.write(json.dumps(s))
+                sep = ",\n  "
+        f.write("\n]\n")
 
 if __name__ == "__main__":
     main()
@@ -1,49 +1,90 @@
+import array
+import itertools
+import logging
 import random
-import uuid
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Block hashes only need to be unique, not unpredictable, so they come from a
+# counter. Multiplying by an odd 128-bit constant is a bijection modulo 2**128,
+# which keeps them unique while spreading consecutive ids across the leading
+# hex digits shown as short hashes. Counter 0 is never drawn, so no block
+# collides with the all-zero genesis hash.
+_HASH_SIZE = 16
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15F39CC0605CEDC835
+_HASH_MASK = (1 << (8 * _HASH_SIZE)) - 1
+_BLOCK_COUNTER = itertools.count(1)
+
+
+def _next_hash():
+    """Returns 16 unique bytes to simulate a block hash."""
+    n = (next(_BLOCK_COUNTER) * _HASH_MULTIPLIER) & _HASH_MASK
+    return n.to_bytes(_HASH_SIZE, "big")
+
 
 class Block:
     """
     A simplified block structure.
     - height: The block height.
     - parent_hash: The hash of the parent block.
-    - hash: The block's own hash (randomly generated).
+    - hash: The block's own hash (unique per block).
     """
+    __slots__ = ("height", "parent_hash", "hash")
+
     def __init__(self, height, parent_hash):
         self.height = height
         self.parent_hash = parent_hash
-        self.hash = str(uuid.uuid4())  # Use random UUID to simulate a block hash
+        self.hash = _next_hash()  # Unique raw bytes to simulate a block hash
 
     def __repr__(self):
-        # Truncate hashes for readability
-        short_hash = self.hash[:6]
-        short_parent = self.parent_hash[:6] if self.parent_hash else None
+        # Truncate hashes to 6 hex characters for readability
+        short_hash = self.hash[:3].hex()
+        short_parent = self.parent_hash[:3].hex() if self.parent_hash else None
         return f"Block(h={self.height}, hash={short_hash}, parent={short_parent})"
 
 
 # Use a single genesis block shared by all nodes
-FIXED_GENESIS_HASH = "00000000-0000-0000-0000-000000000000"
+FIXED_GENESIS_HASH = bytes(_HASH_SIZE)
 
-GENESIS_BLOCK_TEMPLATE = Block(height=0, parent_hash=None)
+# Build the template without calling __init__, which would draw a hash only to overwrite it
+GENESIS_BLOCK_TEMPLATE = Block.__new__(Block)
+GENESIS_BLOCK_TEMPLATE.height = 0
+GENESIS_BLOCK_TEMPLATE.parent_hash = None
 GENESIS_BLOCK_TEMPLATE.hash = FIXED_GENESIS_HASH
 
 
 class Node:
     """
     A simplified node maintaining a local chain.
-    - self.chain is a list of blocks.
-    - self.chain[-1] is considered the tip of the chain.
+    - The chain is stored column-wise in compact typed containers:
+      self._heights[i] is the height of the i-th block (index 0 being genesis) and
+      self._hash_log holds the raw hashes back to back, _HASH_SIZE bytes per block.
+    - The last entry is considered the tip of the chain.
+    - Parent hashes are not stored: add_block only accepts a block whose parent
+      is the current tip, so the parent of entry i is always the hash of entry i - 1.
     """
     def __init__(self, node_id):
         self.node_id = node_id
-        # Clone the shared genesis block for each node
-        genesis_block = Block(height=GENESIS_BLOCK_TEMPLATE.height,
-                              parent_hash=GENESIS_BLOCK_TEMPLATE.parent_hash)
-        genesis_block.hash = GENESIS_BLOCK_TEMPLATE.hash
-        self.chain = [genesis_block]
+        # Seed the chain with the shared genesis block
+        self._heights = array.array("q", [GENESIS_BLOCK_TEMPLATE.height])
+        self._hash_log = bytearray(GENESIS_BLOCK_TEMPLATE.hash)
+        # Cached copy of the tip, kept in sync by add_block/discard_last_block
+        self._tip_height = GENESIS_BLOCK_TEMPLATE.height
+        self._tip_hash = GENESIS_BLOCK_TEMPLATE.hash
 
     def current_height(self):
         """Returns the height of the local chain tip."""
-        return self.chain[-1].height
+        return self._tip_height
+
+    def tip_hash(self):
+        """Returns the hash of the local chain tip."""
+        return self._tip_hash
+
+    def chain_summary(self):
+        """Returns the local chain as 'height:short_hash' entries, genesis first."""
+        log = self._hash_log
+        return [f"{h}:{log[i * _HASH_SIZE:i * _HASH_SIZE + 3].hex()}" for i, h in enumerate(self._heights)]
 
     def propose_block(self):
         """
@@ -51,24 +92,45 @@ class Node:
           - height is current_height + 1
           - parent_hash is the hash of the local chain tip
         """
-        latest = self.chain[-1]
-        new_block = Block(height=latest.height + 1, parent_hash=latest.hash)
-        return new_block
+        return Block(height=self._tip_height + 1, parent_hash=self._tip_hash)
 
     def add_block(self, block):
         """
         Add a block if it correctly follows our chain tip:
           - block.height == current_height + 1
           - block.parent_hash == local tip's hash
+        Returns True if the block was appended.
         """
-        if block.height == self.current_height() + 1:
-            if block.parent_hash == self.chain[-1].hash:
-                self.chain.append(block)
+        if block.height == self._tip_height + 1:
+            if block.parent_hash == self._tip_hash:
+                self._heights.append(block.height)
+                self._hash_log += block.hash
+                self._tip_height = block.height
+                self._tip_hash = block.hash
+                return True
+        return False
 
     def discard_last_block(self):
         """Discard the last block, simulating 'self-correction'."""
-        if len(self.chain) > 1:
-            self.chain.pop()
+        if len(self._heights) > 1:
+            self._heights.pop()
+            del self._hash_log[-_HASH_SIZE:]
+            self._tip_height = self._heights[-1]
+            self._tip_hash = bytes(self._hash_log[-_HASH_SIZE:])
+
+    def truncate_to(self, target_height):
+        """
+        Discard every block above target_height in one step.
+        Genesis is always kept, and a chain already at or below target_height is left as is.
+        """
+        if target_height >= self._tip_height:
+            return
+        # Heights start at 0 and grow by one per block, so height == index
+        keep = max(target_height, 0) + 1
+        del self._heights[keep:]
+        del self._hash_log[keep * _HASH_SIZE:]
+        self._tip_height = self._heights[-1]
+        self._tip_hash = bytes(self._hash_log[-_HASH_SIZE:])
 
 
 def random_consensus_round(nodes):
@@ -82,90 +144,77 @@ def random_consensus_round(nodes):
            discards its tip (if needed) and adopts the majority block.
     """
     # 1. Collect all proposed blocks
-    proposed_blocks = []
-    for node in nodes:
-        proposed_blocks.append(node.propose_block())
+    proposed_blocks = [node.propose_block() for node in nodes]
+
+    # Group the proposals by height once, so each node looks up its candidates directly
+    blocks_by_height = defaultdict(list)
+    for b in proposed_blocks:
+        blocks_by_height[b.height].append(b)
 
     # 2. Randomly pick and add one valid block (matching next_height) for each node
-    for node in nodes:
-        next_h = node.current_height() + 1
-        valid_blocks = [b for b in proposed_blocks if b.height == next_h]
+    # Tip heights are tracked locally so the network height is scanned only once.
+    heights = [node.current_height() for node in nodes]
+    max_h = max(heights, default=0)
+    rand = random.random  # bound once, called for every node
+    for i, node in enumerate(nodes):
+        next_h = heights[i] + 1
+        valid_blocks = blocks_by_height.get(next_h)
 
         if valid_blocks:
-            chosen = random.choice(valid_blocks)
-            node.add_block(chosen)
+            chosen = valid_blocks[int(rand() * len(valid_blocks))]
+            if node.add_block(chosen):
+                heights[i] = next_h
         else:
             # 3. If no block is found and there's a higher chain in the network, discard
-            max_h = max(n.current_height() for n in nodes)
-            if max_h > node.current_height():
-                print(f"Node {node.node_id} discarding last block (behind network: {node.current_height()} < {max_h})")
+            if max_h > heights[i]:
+                logger.debug("Node %s discarding last block (behind network: %s < %s)",
+                             node.node_id, heights[i], max_h)
                 node.discard_last_block()
+                heights[i] = node.current_height()
 
     # 4. "Majority-wins" approach, focusing on block hash at the majority height
 
     # Count how many nodes are at each height
-    height_count = {}
-    for node in nodes:
-        h = node.current_height()
-        height_count[h] = height_count.get(h, 0) + 1
+    height_count = Counter(heights)
 
     # Pick the height that has the largest number of nodes (the "majority height")
     if not height_count:
         return
-    majority_height = max(height_count, key=height_count.get)
+    majority_height = height_count.most_common(1)[0][0]
 
-    # Among the nodes that are at majority_height, count how many times each hash occurs
-    hash_count = {}
-    for node in nodes:
-        if node.current_height() == majority_height:
-            tip_hash = node.chain[-1].hash
-            hash_count[tip_hash] = hash_count.get(tip_hash, 0) + 1
-
-    if not hash_count:
-        return
-    # Find the block hash that is the majority at that height
-    majority_hash = max(hash_count, key=hash_count.get)
+    # Split the nodes once: those at majority_height, and those behind it
+    at_majority = [node for node, h in zip(nodes, heights) if h == majority_height]
+    behind = [node for node, h in zip(nodes, heights) if h < majority_height]
 
-    # Pick one node that actually has this majority hash to copy from
+    # Among the nodes that are at majority_height, count how many times each hash occurs,
+    # and find the block hash that is the majority at that height.
+    # at_majority is never empty, so at least one node holds majority_hash to copy from.
     # (In a real system, you'd also reconstruct the entire chain from a common ancestor.)
-    reference_block = None
-    for node in nodes:
-        if node.current_height() == majority_height and node.chain[-1].hash == majority_hash:
-            reference_block = node.chain[-1]
-            break
-
-    if not reference_block:
-        return
+    hash_count = Counter(node.tip_hash() for node in at_majority)
+    majority_hash = hash_count.most_common(1)[0][0]
+
+    def _adopt(node):
+        # Discard blocks until the node is just below majority_height, then add the majority block.
+        # We create a new block object that has the same height/hash,
+        # but uses the node's current tip as the parent, to simulate "catching up."
+        # (Again, in a real system we'd do a full sync from common ancestor.)
+        node.truncate_to(majority_height - 1)
+        if node.current_height() + 1 == majority_height:
+            adopted = Block(majority_height, node.tip_hash())
+            adopted.hash = majority_hash
+            node.add_block(adopted)
 
     # Now, for each node that is either behind (height < majority_height)
     # or at majority_height but with a different hash, adopt the majority block
-    for node in nodes:
-        if node.current_height() < majority_height:
-            # Node is behind. Discard blocks until height is just below majority_height
-            while node.current_height() >= majority_height and len(node.chain) > 1:
-                node.discard_last_block()
+    for node in behind:
+        _adopt(node)
 
-            # Then add the majority block if the height is exactly one less
-            if node.current_height() + 1 == reference_block.height:
-                # We create a new block object that has the same height/hash,
-                # but uses the node's current tip as the parent, to simulate "catching up."
-                adopted = Block(reference_block.height, node.chain[-1].hash)
-                adopted.hash = reference_block.hash
-                node.add_block(adopted)
-
-        elif node.current_height() == majority_height:
-            # Same height, but possibly a different hash
-            local_hash = node.chain[-1].hash
-            if local_hash != majority_hash:
-                print(f"Node {node.node_id} is at majority_height but with a different hash ({local_hash[:6]}), adopting majority ({majority_hash[:6]})")
-                # Discard the last block
-                node.discard_last_block()
-                # Then add the majority block
-                # (Again, in a real system we'd do a full sync from common ancestor.)
-                if node.current_height() + 1 == reference_block.height:
-                    adopted = Block(reference_block.height, node.chain[-1].hash)
-                    adopted.hash = reference_block.hash
-                    node.add_block(adopted)
+    for node in at_majority:
+        local_hash = node.tip_hash()
+        if local_hash != majority_hash:
+            logger.debug("Node %s is at majority_height but with a different hash (%s), adopting majority (%s)",
+                         node.node_id, local_hash[:3].hex(), majority_hash[:3].hex())
+            _adopt(node)
 
 
 def main():
@@ -182,7 +231,7 @@ def main():
 
         # Display the state of each node
         for node in nodes:
-            print(f"Node {node.node_id} | height={node.current_height()} | chain={node.chain}")
+            print(f"Node {node.node_id} | height={node.current_height()} | chain={node.chain_summary()}")
         print("")
 
 if __name__ == "__main__":